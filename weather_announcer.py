@@ -1,15 +1,66 @@
 import os
+import sys
+import json
+import argparse
+import logging
+import atexit
+import time
+import zlib
+import fcntl
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from asterisk.ami import AMIClient, SimpleAction
 from dotenv import load_dotenv
 
+try:
+    import orjson  # Optional, faster JSON parsing
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
 # Weather Underground API configuration
 WU_API_KEY = os.getenv('WU_API_KEY')
 WU_STATION_ID = os.getenv('WU_STATION_ID')  # Your local weather station ID
+if not WU_API_KEY or not WU_STATION_ID:
+    # Fail loudly (non-zero exit) so a misconfigured cron job is noticed
+    raise SystemExit("Error: WU_API_KEY or WU_STATION_ID not set in .env file")
+# Comma-separated neighbor stations used when the local station is offline
+WU_FALLBACK_STATIONS = [s.strip() for s in os.getenv('WU_FALLBACK_STATIONS', '').split(',') if s.strip()]
+WU_STATION_IDS = [WU_STATION_ID] + WU_FALLBACK_STATIONS
+
+# Using the correct API endpoint for Weather Underground
+WU_API_URL = "https://api.weather.com/v2/pws/observations/current"
+WU_PARAMS = {
+    'format': 'json',
+    'units': 'm',
+    'apiKey': WU_API_KEY,
+    'numericPrecision': 'decimal'
+}
+# Per-station query parameters and debug URLs (without the API key), built once
+WU_STATION_PARAMS = {station_id: {'stationId': station_id, **WU_PARAMS} for station_id in WU_STATION_IDS}
+WU_DEBUG_URLS = {
+    station_id: WU_API_URL + "?" + "&".join(f"{k}={v}" for k, v in params.items() if k != 'apiKey')
+    for station_id, params in WU_STATION_PARAMS.items()
+}
+
+# Observation fields the announcement needs, as (field, subfield) pairs
+REQUIRED_FIELDS = (
+    ('metric', 'temp'),
+    ('metric', 'pressure'),
+    ('metric', 'windSpeed'),
+    ('humidity', None),
+    ('winddir', None)
+)
+
+# Observation fields holding the conditions phrase, in order of preference
+CONDITION_FIELDS = ('wxPhraseLong', 'wxPhrase', 'wxPhraseShort')
 
 # AllStar Link configuration
 ASTERISK_HOST = os.getenv('ASTERISK_HOST', 'localhost')
@@ -18,69 +69,155 @@ ASTERISK_USER = os.getenv('ASTERISK_USER')
 ASTERISK_SECRET = os.getenv('ASTERISK_SECRET')
 ALLSTAR_NODE = os.getenv('ALLSTAR_NODE')  # Your AllStar node number
 
-def get_weather_data():
-    """Get weather data from Weather Underground API."""
-    if not WU_API_KEY or not WU_STATION_ID:
-        print("Error: WU_API_KEY or WU_STATION_ID not set in .env file")
+# HTTP session shared by all API calls so the TLS connection is reused
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+# Retry transient failures with exponential backoff (0.5s, 1s, 2s, 4s...),
+# honouring Retry-After when the API rate-limits us
+HTTP_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True,
+    allowed_methods=frozenset({'GET'})
+)
+SESSION = requests.Session()
+# Ask for a gzip-compressed response; it is decoded in C by urllib3
+SESSION.headers.update({
+    'Accept-Encoding': 'gzip',
+    'User-Agent': 'weather-announcer/1.0'
+})
+SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=HTTP_RETRY))
+
+# Local cache of the last successful API response
+CACHE_DIR = os.path.expanduser('~/.cache/weather_announcer')
+CACHE_FILE = os.path.join(CACHE_DIR, 'obs.json')
+WU_CACHE_TTL = int(os.getenv('WU_CACHE_TTL', '300'))  # Seconds a cached response stays fresh
+# Fingerprint of the last announced weather; its mtime is the last announce time
+LAST_HASH_FILE = os.path.join(CACHE_DIR, 'last.hash')
+MAX_SILENCE = int(os.getenv('ANNOUNCE_MAX_SILENCE', '7200'))  # Re-announce unchanged weather after this many seconds
+
+# Announcement schedule
+def parse_hour(name):
+    """Read an optional hour (0-23) from the environment, exiting on invalid values."""
+    value = os.getenv(name)
+    if not value:
         return None
+    try:
+        hour = int(value)
+    except ValueError:
+        hour = -1
+    if not 0 <= hour <= 23:
+        raise SystemExit(f"Error: {name} must be an hour between 0 and 23, got {value!r}")
+    return hour
+
+QUIET_START = parse_hour('QUIET_START')  # Hour (0-23) at which quiet hours begin
+QUIET_END = parse_hour('QUIET_END')  # Hour (0-23) at which quiet hours end
+MIN_INTERVAL_SEC = int(os.getenv('MIN_INTERVAL_SEC', '0'))  # Minimum seconds between announcements
+
+def load_cached_response():
+    """Return the cached API response if it is still fresh, otherwise None."""
+    try:
+        with open(CACHE_FILE) as f:
+            cached = json.load(f)
+        if (cached['station_id'] == WU_STATION_ID
+                and time.time() - cached['fetched_at'] < WU_CACHE_TTL):
+            return cached['data']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
 
-    # Using the correct API endpoint for Weather Underground
-    url = "https://api.weather.com/v2/pws/observations/current"
-    params = {
-        'stationId': WU_STATION_ID,
-        'format': 'json',
-        'units': 'm',
-        'apiKey': WU_API_KEY,
-        'numericPrecision': 'decimal'
-    }
+def save_cached_response(data):
+    """Atomically write the API response to the cache file."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Serialize concurrent writers (e.g. overlapping cron runs)
+        with open(CACHE_FILE + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            tmp_file = f"{CACHE_FILE}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({'station_id': WU_STATION_ID, 'fetched_at': time.time(), 'data': data}, f)
+            os.replace(tmp_file, CACHE_FILE)
+    except OSError as e:
+        logger.warning("Could not write weather cache: %s", e)
+
+def fetch_station_data(station_id):
+    """Fetch and parse the current observation response for one station."""
+    logger.debug("Requesting weather data from station: %s", station_id)
+    # Log the full URL for debugging (without the API key)
+    logger.debug("Request URL: %s", WU_DEBUG_URLS[station_id])
+    response = SESSION.get(WU_API_URL, params=WU_STATION_PARAMS[station_id], timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return orjson.loads(response.content) if orjson else response.json()
+
+def fetch_first_available(station_ids):
+    """Query the primary station, falling back to the others only if it has no observations."""
+    primary, fallbacks = station_ids[0], station_ids[1:]
+    data, error = None, None
+    try:
+        data = fetch_station_data(primary)
+        if data.get('observations') or not fallbacks:
+            return data
+        logger.warning("Station %s returned no observations", primary)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if not fallbacks:
+            raise
+        logger.warning("Station %s unavailable: %s", primary, e)
+        error = e
     
+    # Poll the fallbacks in parallel and use whichever answers first with observations
+    executor = ThreadPoolExecutor(max_workers=len(fallbacks))
     try:
-        print(f"Requesting weather data from station: {WU_STATION_ID}")
-        print(f"Using API key: {WU_API_KEY[:8]}...")  # Only show first 8 characters for security
-        response = requests.get(url, params=params)
-        
-        # Print the full URL for debugging (without the API key)
-        debug_url = url + "?" + "&".join([f"{k}={v}" for k, v in params.items() if k != 'apiKey'])
-        print(f"Request URL: {debug_url}")
-        
-        response.raise_for_status()
-        data = response.json()
+        futures = {executor.submit(fetch_station_data, station_id): station_id for station_id in fallbacks}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.warning("Station %s unavailable: %s", futures[future], e)
+                error = e
+                continue
+            if result.get('observations'):
+                return result
+            data = data or result
+        if data is None:
+            raise error
+        return data
+    finally:
+        executor.shutdown(wait=False)
+
+def get_weather_data():
+    """Get weather data from Weather Underground API."""
+    try:
+        data = load_cached_response()
+        from_cache = data is not None
+        if from_cache:
+            logger.debug("Using cached weather data for station: %s", WU_STATION_ID)
+        else:
+            logger.debug("Using API key: %s...", WU_API_KEY[:8])  # Only show first 8 characters for security
+            data = fetch_first_available(WU_STATION_IDS)
         
-        # Debug: Print the response structure
-        print("API Response received. Checking data structure...")
+        logger.debug("API Response received. Checking data structure...")
         
         if 'observations' not in data or not data['observations']:
-            print("Error: No observations found in API response")
-            print("API Response:", data)
+            logger.error("No observations found in API response: %s", data)
             return None
             
         obs = data['observations'][0]
         
         # Check if all required fields are present
-        required_fields = {
-            'metric': ['temp', 'pressure', 'windSpeed'],
-            'humidity': None,
-            'winddir': None
-        }
-        
-        for field, subfields in required_fields.items():
-            if field not in obs:
-                print(f"Error: Missing field '{field}' in observation data")
-                return None
-            if subfields and isinstance(subfields, list):
-                for subfield in subfields:
-                    if subfield not in obs[field]:
-                        print(f"Error: Missing subfield '{subfield}' in {field}")
-                        return None
+        missing = [
+            (field, subfield) for field, subfield in REQUIRED_FIELDS
+            if obs.get(field) is None or (subfield and subfield not in obs[field])
+        ]
+        if missing:
+            logger.error("Missing fields in observation data: %s",
+                         ", ".join(f"{field}.{subfield}" if subfield else field for field, subfield in missing))
+            return None
         
         # Get weather conditions from available fields
-        conditions = "Unknown"
-        if 'wxPhraseLong' in obs:
-            conditions = obs['wxPhraseLong']
-        elif 'wxPhrase' in obs:
-            conditions = obs['wxPhrase']
-        elif 'wxPhraseShort' in obs:
-            conditions = obs['wxPhraseShort']
+        conditions = next((obs[k] for k in CONDITION_FIELDS if obs.get(k)), "Unknown")
+        
+        if not from_cache:
+            save_cached_response(data)
         
         return {
             'temperature': obs['metric']['temp'],
@@ -88,44 +225,83 @@ def get_weather_data():
             'pressure': obs['metric']['pressure'],
             'wind_speed': obs['metric']['windSpeed'],
             'wind_direction': obs['winddir'],
-            'conditions': conditions
+            'conditions': conditions,
+            '_raw': obs  # Full observation, reused for the raw dump in main()
         }
     except requests.exceptions.RequestException as e:
-        print(f"Network error getting weather data: {e}")
+        logger.error("Network error getting weather data: %s", e)
         if hasattr(e.response, 'text'):
-            print(f"API Error Response: {e.response.text}")
+            logger.error("API Error Response: %s", e.response.text)
         return None
     except ValueError as e:
-        print(f"Error parsing API response: {e}")
-        print("API Response:", response.text if 'response' in locals() else "No response received")
+        logger.error("Error parsing API response: %s", e)
         return None
     except Exception as e:
-        print(f"Unexpected error getting weather data: {e}")
+        logger.exception("Unexpected error getting weather data: %s", e)
         return None
 
+CARDINAL_DIRECTIONS = ('N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW')
+
+def get_wind_cardinal(wind_direction):
+    """Convert a wind bearing in degrees into a cardinal direction."""
+    # Each direction covers a 45 degree sector centred on its bearing
+    index = int((wind_direction + 22.5) // 45) % 8
+    return CARDINAL_DIRECTIONS[index]
+
+def weather_fingerprint(weather_data):
+    """Return a CRC32 of the announced fields, used to detect unchanged weather."""
+    key = (
+        f"{weather_data['temperature']}|{weather_data['humidity']}|{weather_data['pressure']}|"
+        f"{weather_data['wind_speed']}|{get_wind_cardinal(weather_data['wind_direction'])}|"
+        f"{weather_data['conditions']}"
+    )
+    return zlib.crc32(key.encode())
+
+def is_announcement_due(fingerprint):
+    """Return False if this weather was already announced within MAX_SILENCE."""
+    try:
+        with open(LAST_HASH_FILE) as f:
+            last_fingerprint = int(f.read().strip())
+        last_announced = os.path.getmtime(LAST_HASH_FILE)
+    except (OSError, ValueError):
+        return True
+    return fingerprint != last_fingerprint or time.time() - last_announced >= MAX_SILENCE
+
+def should_announce():
+    """Return False when no announcement is due, before any network I/O is done."""
+    if QUIET_START is not None and QUIET_END is not None:
+        hour = time.localtime().tm_hour
+        start, end = QUIET_START, QUIET_END
+        if (start <= hour < end) if start <= end else (hour >= start or hour < end):
+            print("Quiet hours, skipping announcement")
+            return False
+    if MIN_INTERVAL_SEC:
+        try:
+            last_announced = os.path.getmtime(LAST_HASH_FILE)
+        except OSError:
+            return True
+        if time.time() - last_announced < MIN_INTERVAL_SEC:
+            print("Last announcement was too recent, skipping")
+            return False
+    return True
+
+def save_announced_fingerprint(fingerprint):
+    """Remember the fingerprint of the weather that was just announced."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f"{LAST_HASH_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(str(fingerprint))
+        os.replace(tmp_file, LAST_HASH_FILE)
+    except OSError as e:
+        logger.warning("Could not write announcement state: %s", e)
+
 def format_weather_message(weather_data):
     """Format weather data into a readable message."""
     if not weather_data:
         return "Unable to get weather data at this time."
     
-    # Format wind direction into cardinal directions
-    wind_direction = weather_data['wind_direction']
-    cardinal_directions = {
-        'N': (337.5, 22.5),
-        'NE': (22.5, 67.5),
-        'E': (67.5, 112.5),
-        'SE': (112.5, 157.5),
-        'S': (157.5, 202.5),
-        'SW': (202.5, 247.5),
-        'W': (247.5, 292.5),
-        'NW': (292.5, 337.5)
-    }
-    
-    wind_cardinal = 'N'
-    for direction, (min_angle, max_angle) in cardinal_directions.items():
-        if min_angle <= wind_direction < max_angle:
-            wind_cardinal = direction
-            break
+    wind_cardinal = get_wind_cardinal(weather_data['wind_direction'])
     
     message = (
         f"Current weather conditions: {weather_data['conditions']}. "
@@ -137,104 +313,174 @@ def format_weather_message(weather_data):
     )
     return message
 
+# AMI connection shared by every announcement made by this process
+ami_client = None
+ami_login = None
+
+def get_ami_client():
+    """Return the shared AMI client and its login response, logging in on first use."""
+    global ami_client, ami_login
+    if ami_client is None:
+        ami_client = AMIClient(address=ASTERISK_HOST, port=ASTERISK_PORT)
+        # Not awaited here: the next action is pipelined right behind the login
+        ami_login = ami_client.login(username=ASTERISK_USER, secret=ASTERISK_SECRET)
+    return ami_client, ami_login
+
+def close_ami_client():
+    """Log off and drop the shared AMI connection."""
+    global ami_client, ami_login
+    if ami_client is None:
+        return
+    try:
+        # Wait (up to the client timeout) for Asterisk to acknowledge the Logoff; it then
+        # closes the socket itself. disconnect() is avoided because it joins the listener
+        # thread, which blocks forever if the server never hangs up.
+        logoff = ami_client.logoff()
+        if logoff is not None:
+            logoff.response
+    except Exception:
+        pass
+    ami_client = None
+    ami_login = None
+
+atexit.register(close_ami_client)
+
+class AMIBatch:
+    """Queue several AMI actions and send them over the shared login without waiting in between."""
+
+    def __init__(self):
+        self.actions = []
+
+    def add(self, name, **keys):
+        """Queue an action; the client gives each one its own ActionID when sent."""
+        self.actions.append(SimpleAction(name, **keys))
+        return self
+
+    def send(self):
+        """Write the queued actions back to back, then wait for and return their responses.
+
+        A response is None if Asterisk did not answer within the client timeout.
+        """
+        client, login = get_ami_client()
+        futures = [client.send_action(action) for action in self.actions]
+        self.actions = []
+        # Confirm the login only after everything has been queued behind it
+        if login.response is None or login.response.is_error():
+            raise Exception(f"AMI login failed: {login.response}")
+        return [future.response for future in futures]
+
 def announce_to_allstar(message):
     """Send the weather announcement to AllStar Link."""
     try:
-        client = AMIClient(host=ASTERISK_HOST, port=ASTERISK_PORT)
-        client.login(username=ASTERISK_USER, secret=ASTERISK_SECRET)
-        
-        # Create the announcement action
-        action = SimpleAction(
+        # Queue the announcement action; Async makes Asterisk acknowledge it
+        # as soon as the call is queued instead of when it is answered
+        batch = AMIBatch().add(
             'Originate',
             Channel=f'Local/{ALLSTAR_NODE}@from-internal',
             Application='Playback',
             Data='silence/1&weather-announcement',
             Priority=1,
             Timeout=30000,
-            CallerID='Weather Service <1000>'
+            CallerID='Weather Service <1000>',
+            Async='true'
         )
         
-        # Send the action
-        client.send_action(action)
-        client.logoff()
+        response, = batch.send()
+        if response is None or response.is_error():
+            raise Exception(f"Originate failed: {response}")
         print("Weather announcement sent successfully")
+        return True
     except Exception as e:
         print(f"Error sending announcement to AllStar: {e}")
+        close_ami_client()
+        return False
+
+# Raw observation dump, filled in from the observation (obs) and its metric block (m)
+RAW_REPORT_TEMPLATE = (
+    "\nInformación de la Estación:\n"
+    "ID de Estación: {obs[stationID]}\n"
+    "Ubicación: {obs[neighborhood]}\n"
+    "País: {obs[country]}\n"
+    "Coordenadas: {obs[lat]}°N, {obs[lon]}°W\n"
+    "Elevación: {m[elev]} metros\n"
+    "\nInformación Temporal:\n"
+    "Tiempo UTC: {obs[obsTimeUtc]}\n"
+    "Tiempo Local: {obs[obsTimeLocal]}\n"
+    "\nCondiciones Actuales:\n"
+    "Temperatura: {m[temp]}°C\n"
+    "Índice de Calor: {m[heatIndex]}°C\n"
+    "Punto de Rocío: {m[dewpt]}°C\n"
+    "Sensación Térmica: {m[windChill]}°C\n"
+    "Humedad: {obs[humidity]}%\n"
+    "\nInformación del Viento:\n"
+    "Dirección: {obs[winddir]}°\n"
+    "Velocidad: {m[windSpeed]} km/h\n"
+    "Ráfagas: {m[windGust]} km/h\n"
+    "\nPresión y Precipitación:\n"
+    "Presión: {m[pressure]} mb\n"
+    "Tasa de Precipitación: {m[precipRate]} mm/h\n"
+    "Precipitación Total: {m[precipTotal]} mm\n"
+    "\nOtros Datos:\n"
+    "Radiación Solar: {obs[solarRadiation]}\n"
+    "Índice UV: {obs[uv]}\n"
+    "Estado QC: {obs[qcStatus]}"
+)
+
+# Formatted weather information, followed by the message to be announced
+WEATHER_REPORT_TEMPLATE = (
+    "\n=== Weather Information ===\n"
+    "Conditions: {w[conditions]}\n"
+    "Temperature: {w[temperature]}°C\n"
+    "Humidity: {w[humidity]}%\n"
+    "Wind Speed: {w[wind_speed]} km/h\n"
+    "Wind Direction: {w[wind_direction]}°\n"
+    "Pressure: {w[pressure]} mb\n"
+    "========================\n\n"
+    "Formatted message:\n"
+    "{message}\n"
+)
+
+def render_report(weather_data, message, verbose=False):
+    """Render the console report, including the raw observation dump when verbose."""
+    report = ""
+    if verbose:
+        try:
+            obs = weather_data['_raw']
+            raw = RAW_REPORT_TEMPLATE.format(obs=obs, m=obs['metric'])
+        except Exception as e:
+            raw = f"Error getting raw data: {e}"
+        report += f"\n=== Raw API Response ===\n{raw}\n=======================\n\n"
+    report += WEATHER_REPORT_TEMPLATE.format(w=weather_data, message=message)
+    return report
 
 def main():
+    parser = argparse.ArgumentParser(description="Announce the current weather on AllStar Link.")
+    parser.add_argument('--verbose', action='store_true',
+                        help="also print the raw observation returned by the API")
+    args = parser.parse_args()
+    
+    if not should_announce():
+        return
+    
     print("Getting weather data...")
     weather_data = get_weather_data()
     
     if weather_data:
         message = format_weather_message(weather_data)
         
-        # Print raw API response
-        print("\n=== Raw API Response ===")
-        try:
-            response = requests.get(
-                "https://api.weather.com/v2/pws/observations/current",
-                params={
-                    'stationId': WU_STATION_ID,
-                    'format': 'json',
-                    'units': 'm',
-                    'apiKey': WU_API_KEY,
-                    'numericPrecision': 'decimal'
-                }
-            )
-            data = response.json()
-            obs = data['observations'][0]
-            
-            print("\nInformación de la Estación:")
-            print(f"ID de Estación: {obs['stationID']}")
-            print(f"Ubicación: {obs['neighborhood']}")
-            print(f"País: {obs['country']}")
-            print(f"Coordenadas: {obs['lat']}°N, {obs['lon']}°W")
-            print(f"Elevación: {obs['metric']['elev']} metros")
-            
-            print("\nInformación Temporal:")
-            print(f"Tiempo UTC: {obs['obsTimeUtc']}")
-            print(f"Tiempo Local: {obs['obsTimeLocal']}")
-            
-            print("\nCondiciones Actuales:")
-            print(f"Temperatura: {obs['metric']['temp']}°C")
-            print(f"Índice de Calor: {obs['metric']['heatIndex']}°C")
-            print(f"Punto de Rocío: {obs['metric']['dewpt']}°C")
-            print(f"Sensación Térmica: {obs['metric']['windChill']}°C")
-            print(f"Humedad: {obs['humidity']}%")
-            
-            print("\nInformación del Viento:")
-            print(f"Dirección: {obs['winddir']}°")
-            print(f"Velocidad: {obs['metric']['windSpeed']} km/h")
-            print(f"Ráfagas: {obs['metric']['windGust']} km/h")
-            
-            print("\nPresión y Precipitación:")
-            print(f"Presión: {obs['metric']['pressure']} mb")
-            print(f"Tasa de Precipitación: {obs['metric']['precipRate']} mm/h")
-            print(f"Precipitación Total: {obs['metric']['precipTotal']} mm")
-            
-            print("\nOtros Datos:")
-            print(f"Radiación Solar: {obs['solarRadiation']}")
-            print(f"Índice UV: {obs['uv']}")
-            print(f"Estado QC: {obs['qcStatus']}")
-            
-        except Exception as e:
-            print(f"Error getting raw data: {e}")
-        print("=======================\n")
-        
-        # Print formatted weather information
-        print("\n=== Weather Information ===")
-        print(f"Conditions: {weather_data['conditions']}")
-        print(f"Temperature: {weather_data['temperature']}°C")
-        print(f"Humidity: {weather_data['humidity']}%")
-        print(f"Wind Speed: {weather_data['wind_speed']} km/h")
-        print(f"Wind Direction: {weather_data['wind_direction']}°")
-        print(f"Pressure: {weather_data['pressure']} mb")
-        print("========================\n")
+        sys.stdout.write(render_report(weather_data, message, verbose=args.verbose))
         
-        print("Formatted message:")
-        print(message)
+        # Skip the transmission if this exact weather was announced recently
+        fingerprint = weather_fingerprint(weather_data)
+        if not is_announcement_due(fingerprint):
+            print("Weather unchanged since last announcement, skipping")
+            return
+        if announce_to_allstar(message):
+            save_announced_fingerprint(fingerprint)
     else:
         print("Failed to get weather data")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING').upper(),
+                        format='%(levelname)s: %(message)s')
     main() 
\ No newline at end of file